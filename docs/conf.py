@@ -74,29 +74,17 @@ autodoc_default_options = {
         '__weakref__',
         '__module__',
         '__hash__',
-        '__dict__'
+        '__dict__',
+        '__slots__'
     ])
 }
 autodoc_preserve_defaults = True
 autodoc_typehints = 'description'
 autodoc_typehints_description_target = 'documented'
 
-# Allow references/links to definitions found in the Python documentation
-# and in the documentation for this package's dependencies.
-
-def rtd_url_for_installed_version(name):
-    prefix = 'https://' + name + '.readthedocs.io/en/'
-
-    if sys.version_info.major == 3 and sys.version_info.minor == 7:
-        import pkg_resources
-        return prefix + pkg_resources.get_distribution(name).version
-
-    import importlib.metadata
-    return prefix + importlib.metadata.version(name)
-
+# Allow references/links to definitions found in the Python documentation.
 intersphinx_mapping = {
     'python': ('https://docs.python.org/3', None),
-    'lagrange': (rtd_url_for_installed_version('lagrange'), None),
 }
 
 
@@ -3,12 +3,11 @@ Minimal pure-Python implementation of
 `Shamir's secret sharing scheme <https://en.wikipedia.org/wiki/Shamir%27s_secret_sharing>`__.
 """
 from __future__ import annotations
-import doctest
 import warnings
-from typing import Union, Optional, Sequence, Iterable
+from typing import Union, Optional, Callable, Sequence, Iterable, Tuple
+import functools
 import base64
 import secrets
-import lagrange
 
 _MODULUS_DEFAULT = (2 ** 127) - 1
 """
@@ -16,6 +15,52 @@ Default prime modulus (equivalent to ``(2 ** 127) - 1``) that is used for
 creating secret shares if a prime modulus is not specified explicitly.
 """
 
+_MODULUS_DEFAULT_LENGTH = (_MODULUS_DEFAULT.bit_length() + 7) // 8
+"""
+Number of bytes used to encode values under the default prime modulus (as well
+as the default prime modulus itself) within the output of :obj:`share.to_bytes`.
+"""
+
+_MODULUS_DEFAULT_LENGTH_BYTES = _MODULUS_DEFAULT_LENGTH.to_bytes(4, 'little')
+"""
+Encoding of the byte length of values under the default prime modulus (as it
+appears in the output of :obj:`share.to_bytes`).
+"""
+
+_MODULUS_DEFAULT_BYTES = _MODULUS_DEFAULT.to_bytes(_MODULUS_DEFAULT_LENGTH, 'little')
+"""
+Encoding of the default prime modulus (as it appears in the output of
+:obj:`share.to_bytes`).
+"""
+
+def _random_field_elements(modulus: int, quantity: int) -> Sequence[int]:
+    """
+    Generate uniformly random field elements (*i.e.*, integers in the range
+    ``[0, modulus)``) using a single draw of random bytes for the common case.
+
+    :param modulus: Prime modulus corresponding to the finite field.
+    :param quantity: Number of field elements to generate.
+
+    >>> rs = _random_field_elements(31, 1000)
+    >>> len(rs) == 1000 and all(0 <= r < 31 for r in rs)
+    True
+
+    Each candidate is masked to the bit length of the largest field element
+    and any candidate that is out of range is replaced by an individually
+    sampled element (via rejection sampling), so the output is uniform.
+    """
+    bits = (modulus - 1).bit_length()
+    mask = (1 << bits) - 1
+    length = (bits + 7) // 8
+    bs = secrets.token_bytes(length * quantity)
+
+    elements = []
+    for i in range(0, length * quantity, length):
+        element = int.from_bytes(bs[i: (i + length)], 'little') & mask
+        elements.append(element if element < modulus else secrets.randbelow(modulus))
+
+    return elements
+
 class share:
     """
     Data structure for representing an individual secret share. Normally, the
@@ -39,6 +84,8 @@ class share:
       ...
     ValueError: index must be an integer that can be represented using at most 32 bits
     """
+    __slots__ = ('index', 'value', 'modulus')
+
     def __init__(self: share, index: int, value: int, modulus: Optional[int] = _MODULUS_DEFAULT):
         """
         Create a share instance according to the supplied parameters.
@@ -95,7 +142,7 @@ class share:
         >>> (s.index, s.value) == (3, 2**100)
         True
         """
-        return share.from_bytes(base64.standard_b64decode(s))
+        return share.from_bytes(base64.b64decode(s))
 
     def __add__(self: share, other: Union[share, int]) -> share:
         """
@@ -264,6 +311,17 @@ class share:
           ...
         ValueError: scalar must be a nonnegative integer
 
+        Multiplication by the scalars ``0`` and ``1`` does not require any
+        arithmetic on the value of this share (unless the value must still be
+        reduced modulo the modulus).
+
+        >>> share(123, 456, 1021) * 1
+        share(123, 456, 1021)
+        >>> share(123, 456, 1021) * 0
+        share(123, 0, 1021)
+        >>> share(1, 50, 31) * 1
+        share(1, 19, 31)
+
         The examples below test this scalar multiplication method for a range
         of share quantities and a number of random scalar values.
 
@@ -280,6 +338,12 @@ class share:
         if scalar < 0:
             raise ValueError('scalar must be a nonnegative integer')
 
+        if scalar == 1 and self.value < self.modulus:
+            return self
+
+        if scalar == 0:
+            return share(self.index, 0, self.modulus)
+
         return share(
             self.index,
             (self.value * scalar) % self.modulus,
@@ -356,14 +420,31 @@ class share:
 
         >>> share.from_bytes(share(3, 2**100).to_bytes()).index
         3
+
+        The encoding always reflects the current modulus of this instance.
+
+        >>> s = share(1, 5, 31)
+        >>> s.modulus = 2**127 - 1
+        >>> t = share.from_bytes(s.to_bytes())
+        >>> (t.index, t.value, t.modulus) == (1, 5, 2**127 - 1)
+        True
         """
+        # The length and modulus encodings are fixed for the default modulus.
+        if self.modulus == _MODULUS_DEFAULT:
+            return b''.join([
+                self.index.to_bytes(4, 'little'),
+                _MODULUS_DEFAULT_LENGTH_BYTES,
+                self.value.to_bytes(_MODULUS_DEFAULT_LENGTH, 'little'),
+                _MODULUS_DEFAULT_BYTES
+            ])
+
         length = (self.modulus.bit_length() + 7) // 8
-        return (
-            int(self.index).to_bytes(4, 'little') + \
-            int(length).to_bytes(4, 'little') + \
-            int(self.value).to_bytes(length, 'little') + \
-            int(self.modulus).to_bytes(length, 'little')
-        )
+        return b''.join([
+            self.index.to_bytes(4, 'little'),
+            length.to_bytes(4, 'little'),
+            self.value.to_bytes(length, 'little'),
+            self.modulus.to_bytes(length, 'little')
+        ])
 
     def to_base64(self: share) -> str:
         """
@@ -377,7 +458,7 @@ class share:
         >>> share.from_base64(share(3, 2**100).to_base64()).value == 2**100
         True
         """
-        return base64.standard_b64encode(self.to_bytes()).decode('utf-8')
+        return base64.b64encode(self.to_bytes()).decode('ascii')
 
     def __str__(self: share) -> str:
         """
@@ -405,7 +486,8 @@ def shares(
         value: int,
         quantity: int,
         modulus: Optional[int] = _MODULUS_DEFAULT,
-        threshold: Optional[int] = None
+        threshold: Optional[int] = None,
+        randbelow: Optional[Callable[[int], int]] = None
     ) -> Sequence[share]:
     """
     Transforms an integer value into the specified number of secret shares, with
@@ -419,6 +501,8 @@ def shares(
         creating secret shares.
     :param threshold: Minimum number of shares that will be required to
         reconstruct a value.
+    :param randbelow: Function that returns a random nonnegative integer that
+        is less than its argument (to be used for generating coefficients).
 
     A modulus may be supplied; it is expected (but not checked) that the supplied
     modulus is a prime number.
@@ -480,7 +564,26 @@ def shares(
 
     >>> len(shares(1, quantity=7, modulus=11, threshold=3))
     7
+
+    By default, random coefficients are generated using the built-in
+    :obj:`secrets.token_bytes` function. An alternative source of randomness
+    (with an interface matching that of :obj:`secrets.randbelow`) can be
+    supplied. It is the responsibility of the caller to ensure that such a
+    source is cryptographically secure.
+
+    >>> import random
+    >>> ss = shares(123, 3, modulus=1223, randbelow=random.Random(0).randrange)
+    >>> ts = shares(123, 3, modulus=1223, randbelow=random.Random(0).randrange)
+    >>> [s.value for s in ss] == [t.value for t in ts]
+    True
+    >>> interpolate(ss)
+    123
+    >>> shares(123, 3, randbelow=123)
+    Traceback (most recent call last):
+      ...
+    TypeError: source of randomness must be callable
     """
+    # pylint: disable=too-many-branches # Allow large number of branches for type checking.
     if not isinstance(value, int):
         raise TypeError('value must be an integer')
 
@@ -507,39 +610,125 @@ def shares(
     if value >= modulus:
         raise ValueError('value cannot be greater than the prime modulus')
 
+    if randbelow is not None and not callable(randbelow):
+        raise TypeError('source of randomness must be callable')
+
     # Use the maximum threshold if one is not specified.
     threshold = threshold or quantity
     if threshold > quantity:
         warnings.warn(
-            'quantity of shares should be at least the threshold to be reconstructable'
+            'quantity of shares should be at least the threshold to be reconstructable',
+            stacklevel=2
         )
 
     # Create the coefficients.
-    coefficients = [value] + [secrets.randbelow(modulus) for _ in range(1, threshold)]
+    coefficients = [value] + (
+        _random_field_elements(modulus, threshold - 1)
+        if randbelow is None else
+        [randbelow(modulus) for _ in range(1, threshold)]
+    )
 
     # Compute each share value such that ``shares[i] = f(i)`` if the polynomial
-    # is ``f``.
-    shares_ = [
-        sum(
-            (c_j * (i ** j)) % modulus
-            for j, c_j in enumerate(coefficients)
-        ) % modulus
-        for i in range(1, quantity + 1)
-    ]
-
-    # Embed each shares index (x-coordinate) by shifting right and using the new lowest 32-bits.
-    shares_ = [share(index + 1, value, modulus) for (index, value) in enumerate(shares_)]
+    # is ``f``. Horner's method is used to evaluate the polynomial, requiring
+    # only one multiplication (by the small index ``i``) per coefficient. The
+    # accumulator is only reduced once it exceeds the square of the modulus
+    # (rather than after every step), with one final reduction at the end.
+    bound = 1 << (2 * modulus.bit_length())
+    coefficients_reversed = tuple(reversed(coefficients))
+    shares_ = []
+    for i in range(1, quantity + 1):
+        acc = 0
+        for c in coefficients_reversed:
+            acc = acc * i + c
+            if acc >= bound:
+                acc %= modulus
+
+        # Each share is constructed directly with its index (x-coordinate).
+        shares_.append(share(i, acc % modulus, modulus))
 
     return shares_
 
+def _inverses(values: Sequence[int], modulus: int) -> Sequence[int]:
+    """
+    Compute the multiplicative inverses of a sequence of field elements using
+    a single modular exponentiation (via Montgomery's batch inversion technique).
+
+    :param values: Sequence of nonzero field elements.
+    :param modulus: Prime modulus corresponding to the finite field.
+
+    >>> _inverses([2, 3, 4], 7)
+    [4, 5, 2]
+    """
+    # Compute the running products ``values[0] * ... * values[i - 1]``.
+    prefixes = []
+    acc = 1
+    for v in values:
+        prefixes.append(acc)
+        acc = (acc * v) % modulus
+
+    # Invert the product of all the values once, then recover each individual
+    # inverse by walking backwards through the running products.
+    inverse = pow(acc, modulus - 2, modulus)
+    inverses = [0] * len(values)
+    for i in range(len(values) - 1, -1, -1):
+        inverses[i] = (inverse * prefixes[i]) % modulus
+        inverse = (inverse * values[i]) % modulus
+
+    return inverses
+
+@functools.lru_cache(maxsize=256)
+def _lagrange_coefficients(xs: Tuple[int, ...], modulus: int) -> Tuple[int, ...]:
+    """
+    Compute the value at ``0`` of each Lagrange basis polynomial corresponding
+    to a tuple of distinct x-coordinates.
+
+    :param xs: Tuple of distinct x-coordinates.
+    :param modulus: Prime modulus corresponding to the finite field.
+
+    The value of the basis polynomial for ``xs[i]`` is the product of all other
+    x-coordinates ``xs[j]`` divided by the product of all the differences
+    ``xs[j] - xs[i]``. Only one modular inversion is performed in total.
+
+    >>> _lagrange_coefficients((1, 2, 3), 17)
+    (3, 14, 1)
+
+    The results are cached, so repeated reconstructions that use the same
+    x-coordinates (*e.g.*, shares held by the same parties) only require a
+    linear number of multiplications.
+    """
+    # Compute the numerators using the running products of the x-coordinates
+    # from both ends of the sequence.
+    suffixes = [1] * (len(xs) + 1)
+    for i in range(len(xs) - 1, -1, -1):
+        suffixes[i] = (suffixes[i + 1] * xs[i]) % modulus
+
+    numerators = []
+    prefix = 1
+    for (i, x) in enumerate(xs):
+        numerators.append((prefix * suffixes[i + 1]) % modulus)
+        prefix = (prefix * x) % modulus
+
+    denominators = []
+    for x_i in xs:
+        denominator = 1
+        for x_j in xs:
+            if x_j != x_i:
+                denominator = (denominator * (x_j - x_i)) % modulus
+        denominators.append(denominator)
+
+    return tuple(
+        (numerator * inverse) % modulus
+        for (numerator, inverse) in zip(numerators, _inverses(denominators, modulus))
+    )
+
 def interpolate(
         shares: Iterable[share], # pylint: disable=redefined-outer-name
         threshold: int = None
     ) -> int:
     """
     Reassemble an integer value from a sequence of secret shares using
-    Lagrange interpolation (via the :obj:`~lagrange.lagrange.interpolate` function
-    exported by the `lagrange <https://pypi.org/project/lagrange>`__ library).
+    Lagrange interpolation (by evaluating the interpolated polynomial at ``0``
+    within the finite field).
 
     :param shares: Iterable of shares from which to reconstruct a value.
     :param threshold: Minimum number of shares that will be required to
@@ -556,6 +745,13 @@ def interpolate(
     >>> interpolate(reversed(shares(123, 12)))
     123
 
+    The intermediate values that depend only on the share indices and the
+    modulus are cached. Thus, reconstructing many values from shares that
+    have the same indices is less expensive than the first reconstruction.
+
+    >>> [interpolate(shares(v, 12, threshold=10)[:10], 10) for v in (123, 456, 789)]
+    [123, 456, 789]
+
     If the threshold is known to be different than the number of shares,
     it should be specified as such. In the example below, the value 123
     was shared with twenty parties such that at least twelve of them
@@ -600,20 +796,56 @@ def interpolate(
     Traceback (most recent call last):
       ...
     ValueError: all shares must have the same modulus
+    >>> interpolate([])
+    Traceback (most recent call last):
+      ...
+    ValueError: at least one share is required
+    >>> interpolate(shares(5, 4, 31), 'abc')
+    Traceback (most recent call last):
+      ...
+    TypeError: threshold must be an integer
+    >>> interpolate(shares(5, 4, 31), -1)
+    Traceback (most recent call last):
+      ...
+    ValueError: threshold must be a nonnegative integer
     """
-    shares = list(shares) # Store shares for reuse, even if an iterable is supplied.
-    if not all (isinstance(s, share) for s in shares):
-        raise TypeError('input must contain share objects')
-
-    moduli = [s.modulus for s in shares]
-    if len(set(moduli)) > 1:
-        raise ValueError('all shares must have the same modulus')
-
-    return lagrange.interpolate(
-        [(s.index, s.value) for s in shares],
-        moduli[0],
-        (threshold or len(shares)) - 1
-    )
+    if threshold is not None:
+        if not isinstance(threshold, int):
+            raise TypeError('threshold must be an integer')
+
+        if threshold < 0:
+            raise ValueError('threshold must be a nonnegative integer')
+
+    # Validate the shares and collect their points in a single pass (so that
+    # any iterable can be supplied).
+    modulus = None
+    points = {}
+    quantity = 0
+    for s in shares:
+        if not isinstance(s, share):
+            raise TypeError('input must contain share objects')
+
+        if modulus is None:
+            modulus = s.modulus
+        elif s.modulus != modulus:
+            raise ValueError('all shares must have the same modulus')
+
+        points[s.index] = s.value
+        quantity += 1
+
+    if modulus is None:
+        raise ValueError('at least one share is required')
+
+    # Use only as many distinct points as the threshold requires.
+    if len(points) < (threshold or quantity):
+        raise ValueError('not enough points for a unique interpolation')
+
+    xs = tuple(points)[:(threshold or quantity)]
+    return sum(
+        points[x] * coefficient
+        for (x, coefficient) in zip(xs, _lagrange_coefficients(xs, modulus))
+    ) % modulus
 
 if __name__ == '__main__': # pragma: no cover
+    import doctest # pylint: disable=import-outside-toplevel # Only needed for testing.
     doctest.testmod()